@@ -6,15 +6,74 @@ BTC 5分钟均线金叉死叉监控脚本 - GitHub Actions版本
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
 import numpy as np
 from datetime import datetime
 
+from ma_kernel import compute_ma_and_cross
+
+MIN_KLINES = 61  # 计算当前和上一根的MA60至少需要61根K线
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时使用requests自带的json解析
+    orjson = None
+
+
+def parse_json(response):
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def dump_json(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def new_session():
+    # 每个数据源各用一个Session复用Keep-Alive连接；requests不保证Session线程安全
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+    session.mount('https://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip', 'Connection': 'keep-alive'})
+    return session
+
+
+def run_in_background(fn):
+    # 守护线程执行，进程退出时不等待仍未返回的请求
+    future = Future()
+    
+    def worker():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
 class BTCSignalMonitor:
     def __init__(self, bark_key):
         self.bark_key = bark_key
         self.bark_url = f"https://api.day.app/{bark_key}"
         self.last_signal = None  # 记录上次推送信号，防止重复
+        # Bark推送中固定不变的字段
+        self._push_base = {
+            'sound': 'birdsong',
+            'icon': 'https://cryptologos.cc/logos/bitcoin-btc-logo.png'
+        }
+        
+        # OKX与Binance在后台线程中并行请求，Bark推送在主线程
+        self._okx_session = new_session()
+        self._binance_session = new_session()
+        self._bark_session = new_session()
     
     def get_btc_price_okx(self):
         try:
@@ -24,17 +83,18 @@ class BTCSignalMonitor:
                 'bar': '5m',
                 'limit': '70'  # 至少要70根5分钟K线才能计算MA60
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self._okx_session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response)
             if data['code'] == '0':
-                prices = []
-                for item in data['data']:
-                    prices.append({
-                        'timestamp': int(item[0]),
-                        'close': float(item[4])
-                    })
-                return sorted(prices, key=lambda x: x['timestamp'])
+                # OKX按时间倒序返回，逆序填充得到连续的正序数组
+                raw = data['data']
+                if len(raw) < MIN_KLINES:
+                    print(f"OKX返回K线不足: {len(raw)}根")
+                    return None
+                timestamps = np.fromiter((int(r[0]) for r in reversed(raw)), dtype=np.int64, count=len(raw))
+                closes = np.fromiter((float(r[4]) for r in reversed(raw)), dtype=np.float64, count=len(raw))
+                return {'closes': closes, 'timestamps': timestamps, 'source': 'OKX'}
             else:
                 print(f"OKX接口异常: {data}")
                 return None
@@ -50,34 +110,45 @@ class BTCSignalMonitor:
                 'interval': '5m',
                 'limit': 70
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = self._binance_session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            prices = []
-            for item in data:
-                prices.append({
-                    'timestamp': int(item[0]),
-                    'close': float(item[4])
-                })
-            return prices
+            data = parse_json(response)
+            if len(data) < MIN_KLINES:
+                print(f"Binance返回K线不足: {len(data)}根")
+                return None
+            timestamps = np.fromiter((int(r[0]) for r in data), dtype=np.int64, count=len(data))
+            closes = np.fromiter((float(r[4]) for r in data), dtype=np.float64, count=len(data))
+            return {'closes': closes, 'timestamps': timestamps, 'source': 'Binance'}
         except Exception as e:
             print(f"获取Binance数据失败: {e}")
             return None
     
-    def calculate_moving_averages(self, prices):
-        if len(prices) < 60:
-            return None
-        closes = [p['close'] for p in prices]
+    def get_btc_5min_klines(self):
+        # 优先使用OKX，保证每次运行的数据来源一致；Binance同时发出作为备份，
+        # OKX失败时无需再串行等待Binance请求
+        deadline = time.monotonic() + 10
+        okx_future = run_in_background(self.get_btc_price_okx)
+        binance_future = run_in_background(self.get_btc_price_binance)
         
-        # 计算MA20列表和MA60列表
-        ma20_list = [np.mean(closes[i-20:i]) for i in range(20, len(closes)+1)]
-        ma60_list = [np.mean(closes[i-60:i]) for i in range(60, len(closes)+1)]
+        for name, future in (("OKX", okx_future), ("Binance", binance_future)):
+            try:
+                klines = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FuturesTimeoutError:
+                print(f"⚠️ {name}数据未在10秒内返回")
+                continue
+            if klines:
+                return klines
+            if name == "OKX":
+                print("⚠️ OKX数据获取失败，使用Binance数据...")
+        return None
+    
+    def calculate_moving_averages(self, klines):
+        closes = np.ascontiguousarray(klines['closes'])
+        if len(closes) < MIN_KLINES:
+            return None
         
-        # 当前和上一根的MA值
-        ma20_current = ma20_list[-1]
-        ma20_prev = ma20_list[-2]
-        ma60_current = ma60_list[-1]
-        ma60_prev = ma60_list[-2]
+        # 当前和上一根的MA值，以及穿越信号(1金叉/-1死叉/0无)
+        ma20_current, ma20_prev, ma60_current, ma60_prev, signal_code = compute_ma_and_cross(closes)
         
         current_price = closes[-1]
         
@@ -87,25 +158,22 @@ class BTCSignalMonitor:
             'ma20_prev': ma20_prev,
             'ma60_current': ma60_current,
             'ma60_prev': ma60_prev,
-            'timestamp': prices[-1]['timestamp']
+            'signal_code': signal_code,
+            'timestamp': int(klines['timestamps'][-1])
         }
     
     def analyze_signal(self, ma_data):
         if not ma_data:
             return None
         
-        ma20_current = ma_data['ma20_current']
-        ma20_prev = ma_data['ma20_prev']
-        ma60_current = ma_data['ma60_current']
-        ma60_prev = ma_data['ma60_prev']
-        
+        signal_code = ma_data['signal_code']
         signal = None
         
         # 判断金叉（短期均线向上穿过长期均线）
-        if ma20_prev <= ma60_prev and ma20_current > ma60_current:
+        if signal_code == 1:
             signal = "MA20金叉MA60，买入信号"
         # 判断死叉（短期均线向下穿过长期均线）
-        elif ma20_prev >= ma60_prev and ma20_current < ma60_current:
+        elif signal_code == -1:
             signal = "MA20死叉MA60，卖出信号"
         
         return signal
@@ -115,21 +183,15 @@ class BTCSignalMonitor:
             if len(content) > 500:
                 content = content[:500] + "..."
             url = f"{self.bark_url}/{title}"
-            data = {
-                'body': content,
-                'level': level,
-                'sound': 'birdsong',
-                'icon': 'https://cryptologos.cc/logos/bitcoin-btc-logo.png'
-            }
-            response = requests.post(url, json=data, timeout=10)
-            response.raise_for_status()
-            result = response.json()
-            if result.get('code') == 200:
-                print(f"✅ 推送成功: {title}")
-                return True
-            else:
-                print(f"❌ 推送失败: {result}")
+            data = self._push_base | {'body': content, 'level': level}
+            body = dump_json(data)
+            response = self._bark_session.post(url, data=body, headers={'Content-Type': 'application/json'}, timeout=10)
+            # 仅在推送失败时才读取返回内容，网关错误可能返回HTML，不做JSON解析
+            if response.status_code != 200:
+                print(f"❌ 推送失败: HTTP {response.status_code} {response.text[:200]}")
                 return False
+            print(f"✅ 推送成功: {title}")
+            return True
         except Exception as e:
             print(f"❌ 发送Bark通知失败: {e}")
             return False
@@ -137,19 +199,14 @@ class BTCSignalMonitor:
     def run_check(self):
         print(f"🔍 开始检查BTC均线穿越信号... {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-        prices = self.get_btc_price_okx()
-        data_source = "OKX"
-        if not prices:
-            print("⚠️ OKX数据获取失败，尝试Binance...")
-            prices = self.get_btc_price_binance()
-            data_source = "Binance"
-        if not prices:
+        klines = self.get_btc_5min_klines()
+        if not klines:
             error_msg = "❌ 无法获取价格数据"
             print(error_msg)
             self.send_bark_notification("BTC监控错误", error_msg, "timeSensitive")
             return
         
-        ma_data = self.calculate_moving_averages(prices)
+        ma_data = self.calculate_moving_averages(klines)
         if not ma_data:
             print("❌ 数据不足，无法计算均线")
             return
@@ -167,7 +224,7 @@ class BTCSignalMonitor:
         
         timestamp = datetime.fromtimestamp(ma_data['timestamp'] / 1000)
         title = f"BTC 5分钟均线信号 {timestamp.strftime('%m-%d %H:%M')}"
-        content = f"{signal}\n当前价格: ${ma_data['current_price']:.2f}\n数据来源: {data_source}"
+        content = f"{signal}\n当前价格: ${ma_data['current_price']:.2f}\n数据来源: {klines['source']}"
         
         print(title)
         print(content)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+均线计算内核 - 各监控脚本共用的MA20/MA60与金叉死叉判断
+安装了numba时使用JIT编译版本，否则退回纯NumPy实现
+numba为可选依赖，GitHub Actions工作流不安装：70根K线上NumPy实现只需微秒级，
+而每次运行安装、导入并编译numba要多花数秒
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # 未安装numba时使用纯NumPy实现
+    njit = None
+
+
+def rolling_means(closes, windows):
+    """多个周期的简单移动平均，共用同一次前缀和；返回与windows顺序一致的数组列表"""
+    # 前缀和计算滚动均值: MA[i] = (c[i+W] - c[i]) / W
+    c = np.empty(len(closes) + 1)
+    c[0] = 0.0
+    np.cumsum(closes, out=c[1:])
+    return [(c[w:] - c[:-w]) / float(w) for w in windows]
+
+
+def rolling_mean(closes, w):
+    """W周期简单移动平均，返回长度为 len(closes)-w+1 的数组"""
+    return rolling_means(closes, (w,))[0]
+
+
+def _compute_ma_and_cross_numpy(closes):
+    ma20, ma60 = rolling_means(closes, (20, 60))
+    
+    # MA20与MA60差值的符号: [上一根, 当前]
+    sign_prev, sign_current = np.sign(ma20[-2:] - ma60[-2:])
+    signal_code = 0
+    if sign_prev <= 0 and sign_current > 0:
+        signal_code = 1
+    elif sign_prev >= 0 and sign_current < 0:
+        signal_code = -1
+    return ma20[-1], ma20[-2], ma60[-1], ma60[-2], signal_code
+
+
+if njit is not None:
+    # 窗口长度写死在函数体内，编译时常量折叠为乘以1/W
+    @njit(cache=True, fastmath=True)
+    def _rolling_mean_20(closes):
+        out = np.empty(closes.shape[0] - 19)
+        s = 0.0
+        for i in range(20):
+            s += closes[i]
+        out[0] = s * (1.0 / 20.0)
+        for i in range(20, closes.shape[0]):
+            s += closes[i] - closes[i - 20]
+            out[i - 19] = s * (1.0 / 20.0)
+        return out
+
+    @njit(cache=True, fastmath=True)
+    def _rolling_mean_60(closes):
+        out = np.empty(closes.shape[0] - 59)
+        s = 0.0
+        for i in range(60):
+            s += closes[i]
+        out[0] = s * (1.0 / 60.0)
+        for i in range(60, closes.shape[0]):
+            s += closes[i] - closes[i - 60]
+            out[i - 59] = s * (1.0 / 60.0)
+        return out
+
+    @njit(cache=True, fastmath=True)
+    def compute_ma_and_cross(closes):
+        ma20 = _rolling_mean_20(closes)
+        ma60 = _rolling_mean_60(closes)
+        ma20_current, ma20_prev = ma20[-1], ma20[-2]
+        ma60_current, ma60_prev = ma60[-1], ma60[-2]
+        
+        signal_code = 0
+        if ma20_prev <= ma60_prev and ma20_current > ma60_current:
+            signal_code = 1
+        elif ma20_prev >= ma60_prev and ma20_current < ma60_current:
+            signal_code = -1
+        return ma20_current, ma20_prev, ma60_current, ma60_prev, signal_code
+else:
+    compute_ma_and_cross = _compute_ma_and_cross_numpy
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+ma_kernel 均线内核测试 - 以 np.convolve(..., 'valid') 为基准校验各实现
+"""
+
+import numpy as np
+import pytest
+
+from ma_kernel import (
+    rolling_mean,
+    rolling_means,
+    compute_ma_and_cross,
+    _compute_ma_and_cross_numpy,
+)
+
+
+def _sma(closes, w):
+    return np.convolve(closes, np.full(w, 1.0 / w), mode='valid')
+
+
+def _expected(closes):
+    ma20 = _sma(closes, 20)
+    ma60 = _sma(closes, 60)
+    signal_code = 0
+    if ma20[-2] <= ma60[-2] and ma20[-1] > ma60[-1]:
+        signal_code = 1
+    elif ma20[-2] >= ma60[-2] and ma20[-1] < ma60[-1]:
+        signal_code = -1
+    return ma20[-1], ma20[-2], ma60[-1], ma60[-2], signal_code
+
+
+def _random_walk(seed, n=70):
+    rng = np.random.default_rng(seed)
+    return 30000.0 + np.cumsum(rng.normal(0.0, 50.0, n))
+
+
+# 下跌后最后一根大阳线 -> 金叉；上涨后最后一根大阴线 -> 死叉；单边下跌 -> 无信号
+GOLDEN = np.r_[np.linspace(110.0, 90.0, 69), 400.0]
+DEATH = np.r_[np.linspace(90.0, 110.0, 69), -200.0]
+FLAT = np.linspace(110.0, 90.0, 70)
+
+KERNELS = [compute_ma_and_cross, _compute_ma_and_cross_numpy]
+
+
+@pytest.mark.parametrize('w', [1, 5, 20, 60, 70])
+def test_rolling_mean_matches_convolve(w):
+    closes = _random_walk(0)
+    result = rolling_mean(closes, w)
+    assert result.shape == (len(closes) - w + 1,)
+    np.testing.assert_allclose(result, _sma(closes, w), rtol=1e-12)
+
+
+def test_rolling_means_matches_convolve():
+    closes = _random_walk(1)
+    ma20, ma60 = rolling_means(closes, (20, 60))
+    np.testing.assert_allclose(ma20, _sma(closes, 20), rtol=1e-12)
+    np.testing.assert_allclose(ma60, _sma(closes, 60), rtol=1e-12)
+
+
+def test_rolling_mean_includes_current_bar():
+    # 最后一个均值必须包含最新一根K线
+    closes = np.r_[np.zeros(19), 20.0]
+    assert rolling_mean(closes, 20)[-1] == 1.0
+
+
+@pytest.mark.parametrize('kernel', KERNELS)
+@pytest.mark.parametrize('seed', range(20))
+def test_compute_ma_and_cross_random(kernel, seed):
+    closes = _random_walk(seed)
+    result = kernel(closes)
+    expected = _expected(closes)
+    np.testing.assert_allclose(result[:4], expected[:4], rtol=1e-12)
+    assert result[4] == expected[4]
+
+
+@pytest.mark.parametrize('kernel', KERNELS)
+@pytest.mark.parametrize('closes, signal_code', [(GOLDEN, 1), (DEATH, -1), (FLAT, 0)])
+def test_compute_ma_and_cross_signal(kernel, closes, signal_code):
+    assert _expected(closes)[4] == signal_code
+    assert kernel(closes)[4] == signal_code